@@ -135,7 +135,7 @@ class BaseAPI:
         try:
             self.before_request(request_args)
 
-            response = requests.request(method, **request_args)
+            response = self.send_request(method, request_args)
             if api_request_id := response.headers.get("x-amzn-RequestId"):
                 self.request_id = api_request_id
                 log.request_id = api_request_id
@@ -190,6 +190,9 @@ class BaseAPI:
     def before_request(self, request_args):
         return
 
+    def send_request(self, method, request_args):
+        return requests.request(method, **request_args)
+
     def process_response(self, response):
         self.handle_error_response(response)
         self.response = response
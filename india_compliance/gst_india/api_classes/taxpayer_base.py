@@ -1,9 +1,12 @@
+import hmac
 import json
+import time
 from base64 import b64decode, b64encode
+from concurrent.futures import ThreadPoolExecutor
 from functools import wraps
 
-from cryptography import x509
-from cryptography.hazmat.backends import default_backend
+import orjson
+import requests
 
 import frappe
 import frappe.utils
@@ -23,8 +26,13 @@ from india_compliance.gst_india.utils.cryptography import (
     encrypt_using_public_key,
     hash_sha256,
     hmac_sha256,
+    parse_certificate,
 )
 
+# (site, gstin) => expiry timestamp, set only when Redis key is set, expires before it
+AUTHENTICATED_GSTINS = {}
+LOCAL_AUTH_CACHE_TTL = 60 * 14
+
 
 def otp_handler(func):
 
@@ -61,10 +69,15 @@ class PublicCertificate(BaseAPI):
 
 class FilesAPI(BaseAPI):
     BASE_PATH = "standard/gstn/files"
+    MAX_DOWNLOAD_WORKERS = 8
+
+    def setup(self, *args, **kwargs):
+        self.prefetched_responses = {}
 
     def get_all(self, url_details):
         response = frappe._dict()
         self.encryption_key = b64decode(url_details.ek)
+        self.prefetch_files([row.get("ul") for row in url_details.urls])
 
         for row in url_details.urls:
             self.hash = row.get("hash")
@@ -78,9 +91,45 @@ class FilesAPI(BaseAPI):
 
         return response
 
+    def prefetch_files(self, urls):
+        """
+        Download all files in parallel.
+
+        Only the HTTP call is made in worker threads. Responses are consumed
+        sequentially by `send_request` so that hash verification, decryption
+        and logging continue to run in the main thread.
+        """
+        if len(urls) < 2:
+            return
+
+        def download(url):
+            try:
+                return requests.get(url, headers=headers)
+            except Exception:
+                # retried in the main thread so that the error is logged
+                return None
+
+        headers = self.default_headers.copy()
+        urls = [self.get_url(url) for url in urls]
+
+        with ThreadPoolExecutor(
+            max_workers=min(self.MAX_DOWNLOAD_WORKERS, len(urls))
+        ) as executor:
+            self.prefetched_responses = dict(zip(urls, executor.map(download, urls)))
+
+    def send_request(self, method, request_args):
+        # Response.__bool__ is False for HTTP errors, hence the explicit check
+        response = self.prefetched_responses.pop(request_args.url, None)
+        if method == "GET" and response is not None:
+            return response
+
+        return super().send_request(method, request_args)
+
     def process_response(self, response):
         computed_hash = hash_sha256(response)
-        if computed_hash != self.hash:
+
+        # compared as bytes, as compare_digest rejects non-ASCII str
+        if not hmac.compare_digest(computed_hash.encode(), (self.hash or "").encode()):
             frappe.throw(
                 _(
                     "Hash of file doesn't match for {0}. File may be corrupted or tampered."
@@ -95,7 +144,7 @@ class FilesAPI(BaseAPI):
 
     def decrypt_data(self, encrypted_json):
         data = aes_decrypt_data(encrypted_json, self.encryption_key)
-        return b64decode(data).decode()
+        return b64decode(data)
 
 
 class TaxpayerAuthenticate(BaseAPI):
@@ -121,14 +170,7 @@ class TaxpayerAuthenticate(BaseAPI):
     }
 
     def request_otp(self):
-        response = super().post(
-            json={
-                "action": "OTPREQUEST",
-                "app_key": self.app_key,
-                "username": self.username,
-            },
-            endpoint="authenticate",
-        )
+        response = self.post_authentication_request("OTPREQUEST")
 
         if response.status_cd != 1:
             return
@@ -139,42 +181,37 @@ class TaxpayerAuthenticate(BaseAPI):
 
     def autheticate_with_otp(self, otp=None):
         if not otp:
+            self.clear_local_auth_cache()
+
             # in enqueue / cron job
             if getattr(frappe.local, "job", None):
                 frappe.local.job.after_job.add(self.reset_auth_token)
                 raise InvalidAuthTokenError
 
             # reset auth token
-            frappe.db.set_value(
-                "GST Credential",
-                {
-                    "gstin": self.company_gstin,
-                    "username": self.username,
-                    "service": "Returns",
-                },
-                {"auth_token": None},
-            )
+            self.update_credential({"auth_token": None})
 
             self.auth_token = None
             return self.request_otp()
 
-        response = super().post(
-            json={
-                "action": "AUTHTOKEN",
-                "app_key": self.app_key,
-                "username": self.username,
-                "otp": otp,
-            },
-            endpoint="authenticate",
-        )
+        response = self.post_authentication_request("AUTHTOKEN", otp=otp)
+        self.set_authenticated_gstin()
+
+        return response
 
+    def set_authenticated_gstin(self):
         frappe.cache.set_value(
             f"authenticated_gstin:{self.company_gstin}",
             True,
             expires_in_sec=60 * 15,
         )
 
-        return response
+        AUTHENTICATED_GSTINS[(frappe.local.site, self.company_gstin)] = (
+            time.time() + LOCAL_AUTH_CACHE_TTL
+        )
+
+    def clear_local_auth_cache(self):
+        AUTHENTICATED_GSTINS.pop((frappe.local.site, self.company_gstin), None)
 
     def refresh_auth_token(self):
         auth_token = self.get_auth_token()
@@ -182,12 +219,16 @@ class TaxpayerAuthenticate(BaseAPI):
         if not auth_token:
             return
 
+        return self.post_authentication_request("REFRESHTOKEN", auth_token=auth_token)
+
+    def post_authentication_request(self, action, **data):
+        # bypass authenticated `post` of subclasses
         return super().post(
             json={
-                "action": "REFRESHTOKEN",
+                "action": action,
                 "app_key": self.app_key,
                 "username": self.username,
-                "auth_token": auth_token,
+                **data,
             },
             endpoint="authenticate",
         )
@@ -219,18 +260,7 @@ class TaxpayerAuthenticate(BaseAPI):
             values["session_key"] = b64encode(session_key).decode()
 
         if values:
-            frappe.db.set_value(
-                "GST Credential",
-                {
-                    "gstin": self.company_gstin,
-                    "username": self.username,
-                    "service": "Returns",
-                },
-                values,
-            )
-
-            # cache of parent doctype GST Settings is not cleared by default so clear it manually
-            frappe.clear_document_cache("GST Settings")
+            self.update_credential(values)
 
         return response
 
@@ -256,8 +286,7 @@ class TaxpayerAuthenticate(BaseAPI):
         if not certificate:
             certificate = PublicCertificate().get_gstn_public_certificate()
 
-        cert = x509.load_pem_x509_certificate(certificate.encode(), default_backend())
-        valid_up_to = cert.not_valid_after
+        valid_up_to = parse_certificate(certificate.encode())[1]
 
         if valid_up_to < now_datetime():
             certificate = PublicCertificate().get_gstn_public_certificate()
@@ -271,24 +300,62 @@ class TaxpayerAuthenticate(BaseAPI):
         if not self.session_expiry:
             return None
 
-        if self.session_expiry <= now_datetime():
+        if time.time() >= self.get_session_expiry_timestamp():
             return None
 
         return self.auth_token
 
+    def get_session_expiry_timestamp(self):
+        """
+        Returns session expiry as epoch seconds.
+
+        Computed once per session expiry to avoid building a timezone-aware
+        `now_datetime` for every request.
+        """
+        cached = getattr(self, "_session_expiry_timestamp", None)
+        if cached and cached[0] == self.session_expiry:
+            return cached[1]
+
+        timestamp = time.time() + (self.session_expiry - now_datetime()).total_seconds()
+        self._session_expiry_timestamp = (self.session_expiry, timestamp)
+
+        return timestamp
+
+    def update_credential(self, values):
+        """
+        Update GST Credential of the current user in a single query
+        """
+        credential = frappe.qb.DocType("GST Credential")
+        query = frappe.qb.update(credential)
+
+        for field, value in values.items():
+            query = query.set(credential[field], value)
+
+        (
+            query.where(credential.gstin == self.company_gstin)
+            .where(credential.username == self.username)
+            .where(credential.service == "Returns")
+            .run()
+        )
+
+        # keep settings loaded in this worker up to date
+        for row in self.settings.credentials:
+            if (
+                row.gstin == self.company_gstin
+                and row.username == self.username
+                and row.service == "Returns"
+            ):
+                row.update(values)
+
+        # cache of parent doctype GST Settings is not cleared by default so clear it manually
+        frappe.clear_document_cache("GST Settings")
+
     def reset_auth_token(self):
         """
         Reset after job to clear the auth token
         """
-        frappe.db.set_value(
-            "GST Credential",
-            {
-                "gstin": self.company_gstin,
-                "username": self.username,
-                "service": "Returns",
-            },
-            {"auth_token": None},
-        )
+        self.update_credential({"auth_token": None})
+        self.clear_local_auth_cache()
 
         if not frappe.flags.in_test:
             frappe.db.commit()  # nosemgrep - executed in after enqueue
@@ -302,6 +369,11 @@ class TaxpayerBaseAPI(TaxpayerAuthenticate):
         "RT-R1R3BAV-1007": "authorization_failed",  # Either auth-token or username is invalid. Raised in get_filing_preference
     }
 
+    # public IP of the server, cached per process to avoid a Redis call per request
+    _public_ip = None
+    _public_ip_fetched_at = 0
+    PUBLIC_IP_CACHE_TTL = 60 * 60
+
     def setup(self, company_gstin):
         if self.sandbox_mode:
             frappe.throw(_("Sandbox mode not supported for Returns API"))
@@ -313,17 +385,47 @@ class TaxpayerBaseAPI(TaxpayerAuthenticate):
                 "gstin": self.company_gstin,
                 "state-cd": self.company_gstin[:2],
                 "username": self.username,
-                "ip-usr": frappe.cache.hget("public_ip", "public_ip", get_public_ip),
+                "ip-usr": self._get_public_ip(),
                 "txn": self.generate_request_id(length=32),
             }
         )
 
+    @staticmethod
+    def _get_public_ip():
+        # stored on TaxpayerBaseAPI so that all subclasses share a single value
+        now = time.monotonic()
+
+        if (
+            TaxpayerBaseAPI._public_ip is None
+            or now - TaxpayerBaseAPI._public_ip_fetched_at
+            > TaxpayerBaseAPI.PUBLIC_IP_CACHE_TTL
+        ):
+            TaxpayerBaseAPI._public_ip = frappe.cache.hget(
+                "public_ip", "public_ip", get_public_ip
+            )
+            TaxpayerBaseAPI._public_ip_fetched_at = now
+
+        return TaxpayerBaseAPI._public_ip
+
     def _fetch_credentials(self, row, require_password=True):
         self.app_key = row.app_key or self.generate_app_key()
         self.auth_token = row.auth_token
-        self.session_key = b64decode(row.session_key or "")
+        self._encoded_session_key = row.session_key or ""
+        self._session_key = None
         self.session_expiry = row.session_expiry
 
+    @property
+    def session_key(self):
+        # decoded lazily as it is not required when no data is encrypted
+        if self._session_key is None:
+            self._session_key = b64decode(self._encoded_session_key)
+
+        return self._session_key
+
+    @session_key.setter
+    def session_key(self, value):
+        self._session_key = value
+
     def _request(
         self,
         method,
@@ -393,11 +495,15 @@ class TaxpayerBaseAPI(TaxpayerAuthenticate):
             decrypted_data = aes_decrypt_data(response.pop("data"), decrypted_rek)
 
             if response.get("hmac"):
-                hmac = hmac_sha256(decrypted_data, decrypted_rek)
-                if hmac != response.hmac:
+                computed_hmac = hmac_sha256(decrypted_data, decrypted_rek)
+                if computed_hmac != response.hmac:
                     frappe.throw(_("HMAC mismatch"))
 
-            response.result = frappe.parse_json(b64decode(decrypted_data).decode())
+            # orjson parses bytes directly, skipping the intermediate str
+            result = orjson.loads(b64decode(decrypted_data))
+            response.result = (
+                frappe._dict(result) if isinstance(result, dict) else result
+            )
 
         return response
 
@@ -408,8 +514,13 @@ class TaxpayerBaseAPI(TaxpayerAuthenticate):
         super().encrypt_request(json)
 
         if json.get("data"):
-            b64_data = b64encode(frappe.as_json(json.get("data")).encode())
-            json["data"] = aes_encrypt_data(b64_data.decode(), self.session_key)
+            b64_data = b64encode(
+                # compact, without changing the encoding (ASCII escaped)
+                frappe.as_json(
+                    json.get("data"), indent=None, separators=(",", ":")
+                ).encode()
+            )
+            json["data"] = aes_encrypt_data(b64_data, self.session_key)
 
             if json.get("st") == "EVC":
                 sid_key = json.get("sid").encode()
@@ -439,9 +550,10 @@ class TaxpayerBaseAPI(TaxpayerAuthenticate):
 
     def is_ignored_error(self, response):
         error_code = response.get("error", {}).get("error_cd")
+        error_type = self.IGNORED_ERROR_CODES.get(error_code)
 
-        if error_code in self.IGNORED_ERROR_CODES:
-            response.error_type = self.IGNORED_ERROR_CODES[error_code]
+        if error_type:
+            response.error_type = error_type
             response.gstin = self.company_gstin
 
             if response.error_type == "otp_requested":
@@ -454,15 +566,7 @@ class TaxpayerBaseAPI(TaxpayerAuthenticate):
 
     def generate_app_key(self):
         app_key = self.generate_request_id(length=32)
-        frappe.db.set_value(
-            "GST Credential",
-            {
-                "gstin": self.company_gstin,
-                "username": self.username,
-                "service": "Returns",
-            },
-            {"app_key": app_key},
-        )
+        self.update_credential({"app_key": app_key})
 
         return app_key
 
@@ -487,17 +591,17 @@ class TaxpayerBaseAPI(TaxpayerAuthenticate):
 
         Generates a new OTP if the auth token is invalid
         """
+        # process-local cache avoids a Redis call, Redis is shared across workers
+        local_key = (frappe.local.site, self.company_gstin)
+        if AUTHENTICATED_GSTINS.get(local_key, 0) > time.time():
+            return
+
         if frappe.cache.get_value(f"authenticated_gstin:{self.company_gstin}"):
             return
 
         # Dummy request
         self.get_filing_preference()
-
-        frappe.cache.set_value(
-            f"authenticated_gstin:{self.company_gstin}",
-            True,
-            expires_in_sec=60 * 15,
-        )
+        self.set_authenticated_gstin()
 
         return
 
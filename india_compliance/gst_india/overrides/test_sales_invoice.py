@@ -16,8 +16,9 @@ class TestSalesInvoice(IntegrationTestCase):
             "PI2021 - 001",
         ]
         for name in invalid_names:
-            doc = frappe._dict(name=name, posting_date=posting_date)
-            self.assertRaises(frappe.ValidationError, validate_invoice_number, doc)
+            with self.subTest(name=name):
+                doc = frappe._dict(name=name, posting_date=posting_date)
+                self.assertRaises(frappe.ValidationError, validate_invoice_number, doc)
 
         valid_names = [
             "012345678901236",
@@ -27,8 +28,9 @@ class TestSalesInvoice(IntegrationTestCase):
             "PI2020-0001",
         ]
         for name in valid_names:
-            doc = frappe._dict(name=name, posting_date=posting_date)
-            try:
-                validate_invoice_number(doc)
-            except frappe.ValidationError:
-                self.fail("Valid name {} throwing error".format(name))
+            with self.subTest(name=name):
+                doc = frappe._dict(name=name, posting_date=posting_date)
+                try:
+                    validate_invoice_number(doc)
+                except frappe.ValidationError:
+                    self.fail("Valid name {} throwing error".format(name))
@@ -874,20 +874,22 @@ def merge_dicts(d1: dict, d2: dict) -> dict:
         'key4': 'value4',
         'key5': 'value5'
     }
+
+    Note: Lists in d1 are extended in place to avoid copying them on every merge.
     """
-    for key in set(d1.keys()) | set(d2.keys()):
-        if key in d2 and key in d1:
-            if isinstance(d1[key], dict) and isinstance(d2[key], dict):
-                merge_dicts(d1[key], d2[key])
+    for key, value in d2.items():
+        if key in d1:
+            if isinstance(d1[key], dict) and isinstance(value, dict):
+                merge_dicts(d1[key], value)
 
-            elif isinstance(d1[key], list) and isinstance(d2[key], list):
-                d1[key] = d1[key] + d2[key]
+            elif isinstance(d1[key], list) and isinstance(value, list):
+                d1[key].extend(value)
 
             else:
-                d1[key] = copy.deepcopy(d2[key])
+                d1[key] = copy.deepcopy(value)
 
-        elif key in d2:
-            d1[key] = copy.deepcopy(d2[key])
+        else:
+            d1[key] = copy.deepcopy(value)
 
     return d1
 
@@ -1,13 +1,14 @@
 import hmac
 from base64 import b64decode, b64encode
+from functools import lru_cache
 from hashlib import sha256
 
-from Crypto.Cipher import AES, PKCS1_v1_5
+from Crypto.Cipher import PKCS1_v1_5
 from Crypto.PublicKey import RSA
-from Crypto.Util.Padding import pad, unpad
 from cryptography import x509
 from cryptography.hazmat.backends import default_backend
-from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives import padding, serialization
+from cryptography.hazmat.primitives.ciphers import Cipher, algorithms, modes
 
 import frappe
 from frappe import _
@@ -16,14 +17,19 @@ from frappe.utils import now_datetime
 BS = 16
 
 
-def aes_encrypt_data(data: str, key: bytes | str) -> str:
-    raw = pad(data.encode(), BS)
+def aes_encrypt_data(data: str | bytes, key: bytes | str) -> str:
+    if isinstance(data, str):
+        data = data.encode()
 
     if isinstance(key, str):
         key = key.encode()
 
-    cipher = AES.new(key, AES.MODE_ECB)
-    enc = cipher.encrypt(raw)
+    # pass the complete buffer to OpenSSL in one call
+    padder = padding.PKCS7(BS * 8).padder()
+    raw = padder.update(data) + padder.finalize()
+
+    encryptor = Cipher(algorithms.AES(key), modes.ECB()).encryptor()
+    enc = encryptor.update(raw) + encryptor.finalize()
 
     return b64encode(enc).decode()
 
@@ -33,13 +39,15 @@ def aes_decrypt_data(encrypted: str, key: bytes | str) -> bytes:
         key = key.encode()
 
     encrypted = b64decode(encrypted)
-    cipher = AES.new(key, AES.MODE_ECB)
-    decrypted = unpad(cipher.decrypt(encrypted), BS)
 
-    return decrypted
+    decryptor = Cipher(algorithms.AES(key), modes.ECB()).decryptor()
+    decrypted = decryptor.update(encrypted) + decryptor.finalize()
 
+    unpadder = padding.PKCS7(BS * 8).unpadder()
+    return unpadder.update(decrypted) + unpadder.finalize()
 
-def hmac_sha256(data: str, key: bytes) -> str:
+
+def hmac_sha256(data: bytes, key: bytes) -> str:
     hmac_value = hmac.new(key, data, sha256)
     return b64encode(hmac_value.digest()).decode()
 
@@ -52,9 +60,7 @@ def encrypt_using_public_key(data: str, certificate: bytes) -> str:
     if not data:
         return
 
-    cert = x509.load_pem_x509_certificate(certificate, default_backend())
-
-    valid_up_to = cert.not_valid_after
+    cert, valid_up_to = parse_certificate(certificate)
     if valid_up_to < now_datetime():
         frappe.throw(_("Public Certificate has expired"))
 
@@ -73,3 +79,13 @@ def encrypt_using_public_key(data: str, certificate: bytes) -> str:
     ciphertext = cipher.encrypt(data)
 
     return b64encode(ciphertext).decode()
+
+
+@lru_cache(maxsize=8)
+def parse_certificate(certificate: bytes):
+    """
+    Returns parsed certificate along with its expiry.
+    Cached to avoid parsing the same certificate for every request.
+    """
+    cert = x509.load_pem_x509_certificate(certificate, default_backend())
+    return cert, cert.not_valid_after
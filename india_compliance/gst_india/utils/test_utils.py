@@ -5,6 +5,11 @@ import frappe
 from frappe.tests import IntegrationTestCase
 from frappe.utils import getdate
 
+from india_compliance.gst_india.utils.cryptography import (
+    aes_decrypt_data,
+    aes_encrypt_data,
+)
+
 
 class TestUtils(IntegrationTestCase):
 
@@ -49,3 +54,25 @@ class TestUtils(IntegrationTestCase):
 
             for i, expected_date in enumerate(expected_date_range):
                 self.assertEqual(expected_date, actual_date_range[i])
+
+
+class TestAESEncryption(IntegrationTestCase):
+    KEY = b"0123456789abcdef0123456789abcdef"
+
+    # ciphertexts generated independently using AES-256-ECB with PKCS7 padding
+    KNOWN_ANSWERS = {
+        # exact multiple of block size, adds a full block of padding
+        b"india compliance": "KTjW1y9p0Ov9YRH8F9dMf4qjYkH96N8FTcMlxsaVuJ4=",
+        b'{"gstin": "24AAQCA8719H1ZC"}': "3mE3N4ODmHtfwRdgVfusQlOWcUA5NFqSI0vey7vDftU=",
+        b"GSTN": "kX5DT805t+VPxexDcV1Q7Q==",
+    }
+
+    def test_aes_encrypt_decrypt(self):
+        for data, expected in self.KNOWN_ANSWERS.items():
+            with self.subTest(data=data):
+                self.assertEqual(aes_encrypt_data(data, self.KEY), expected)
+                self.assertEqual(aes_encrypt_data(data.decode(), self.KEY), expected)
+                self.assertEqual(aes_encrypt_data(data, self.KEY.decode()), expected)
+
+                self.assertEqual(aes_decrypt_data(expected, self.KEY), data)
+                self.assertEqual(aes_decrypt_data(expected, self.KEY.decode()), data)
@@ -1,39 +1,36 @@
 import frappe
+from frappe.query_builder import Case
 from frappe.query_builder.functions import IfNull
 
+BATCH_SIZE = 10000
+
 
 def execute():
     PI = frappe.qb.DocType("Purchase Invoice")
-    PI_ITEM = frappe.qb.DocType("Purchase Invoice Item")
     BOE = frappe.qb.DocType("Bill of Entry")
 
-    (
-        frappe.qb.update(PI)
-        .set(PI.reconciliation_status, "Not Applicable")
-        .join(PI_ITEM)
-        .on(PI.name == PI_ITEM.parent)
-        .where(PI.docstatus == 1)
-        .where(
-            (IfNull(PI.supplier_gstin, "") == "")
-            | (
-                IfNull(PI.gst_category, "").isin(
-                    ["Registered Composition", "Unregistered", "Overseas"]
-                )
-            )
-            | (IfNull(PI.supplier_gstin, "") == PI.company_gstin)
-            | (IfNull(PI.is_opening, "") == "Yes")
-            | (PI_ITEM.gst_treatment == "Non-GST")
+    # Update in batches to keep row locks and transaction size bounded
+    last_name = ""
+    while True:
+        invoices = (
+            frappe.qb.from_(PI)
+            .select(PI.name)
+            .where(PI.docstatus == 1)
+            .where(IfNull(PI.reconciliation_status, "") == "")
+            .where(PI.name > last_name)
+            .orderby(PI.name)
+            .limit(BATCH_SIZE)
+            .run(pluck=True)
         )
-        .run()
-    )
 
-    (
-        frappe.qb.update(PI)
-        .set(PI.reconciliation_status, "Unreconciled")
-        .where(PI.docstatus == 1)
-        .where(IfNull(PI.reconciliation_status, "") == "")
-        .run()
-    )
+        if not invoices:
+            break
+
+        update_purchase_invoices(invoices)
+        last_name = invoices[-1]
+
+        # nosemgrep
+        frappe.db.commit()  # commit after every batch
 
     (
         frappe.qb.update(BOE)
@@ -41,3 +38,41 @@ def execute():
         .where(BOE.docstatus == 1)
         .run()
     )
+
+
+def update_purchase_invoices(invoices):
+    PI = frappe.qb.DocType("Purchase Invoice")
+    PI_ITEM = frappe.qb.DocType("Purchase Invoice Item")
+
+    non_gst_invoices = (
+        frappe.qb.from_(PI_ITEM)
+        .select(PI_ITEM.parent)
+        .where(PI_ITEM.parenttype == "Purchase Invoice")
+        .where(PI_ITEM.parent.isin(invoices))
+        .where(PI_ITEM.gst_treatment == "Non-GST")
+    )
+
+    # Single pass over Purchase Invoice instead of a join (which visits
+    # an invoice once per matching item) followed by a second update
+    (
+        frappe.qb.update(PI)
+        .set(
+            PI.reconciliation_status,
+            Case()
+            .when(
+                (IfNull(PI.supplier_gstin, "") == "")
+                | (
+                    IfNull(PI.gst_category, "").isin(
+                        ["Registered Composition", "Unregistered", "Overseas"]
+                    )
+                )
+                | (IfNull(PI.supplier_gstin, "") == PI.company_gstin)
+                | (IfNull(PI.is_opening, "") == "Yes")
+                | (PI.name.isin(non_gst_invoices)),
+                "Not Applicable",
+            )
+            .else_("Unreconciled"),
+        )
+        .where(PI.name.isin(invoices))
+        .run()
+    )
@@ -1,4 +1,13 @@
+import re
+
 import frappe
+from frappe.query_builder.functions import Length
+
+BATCH_SIZE = 5000
+# ASCII only, as unicode whitespace was not matched by the database regex
+REGEX_PATTERN = re.compile(
+    r"^[a-zA-Z]{2}[-\s]?[0-9]{2}[-\s]?[a-zA-Z]{1,3}[-\s]?[0-9]{4}$", re.ASCII
+)
 
 
 def execute():
@@ -11,14 +20,52 @@ def execute():
     - gj06-ab-1234
     - Gj06 abc 1234
     """
-    REGEX_PATTERN = r"^[a-zA-Z]{2}[-\s]?[0-9]{2}[-\s]?[a-zA-Z]{1,3}[-\s]?[0-9]{4}$"
+    # Update in batches to keep row locks and transaction size bounded
+    last_name = ""
+    while True:
+        receipts = get_receipts_with_lr_no(last_name)
+        if not receipts:
+            break
+
+        # regex is matched in Python, once per row
+        vehicle_receipts = [
+            row.name for row in receipts if REGEX_PATTERN.fullmatch(row.lr_no)
+        ]
+
+        if vehicle_receipts:
+            update_vehicle_no(vehicle_receipts)
+
+        last_name = receipts[-1].name
+
+        # nosemgrep
+        frappe.db.commit()  # commit after every batch
+
+
+def get_receipts_with_lr_no(last_name):
     pr = frappe.qb.DocType("Purchase Receipt")
 
+    return (
+        frappe.qb.from_(pr)
+        .select(pr.name, pr.lr_no)
+        # cheap checks in the database, matching values are 9 to 14 characters long
+        .where(pr.lr_no.isnotnull())
+        .where(pr.lr_no != "")
+        .where(Length(pr.lr_no).between(9, 14))
+        .where(pr.name > last_name)
+        .orderby(pr.name)
+        .limit(BATCH_SIZE)
+        .run(as_dict=True)
+    )
+
+
+def update_vehicle_no(receipts):
+    pr = frappe.qb.DocType("Purchase Receipt")
+
+    # Both columns in a single pass, assignments use the original value of lr_no
     (
         frappe.qb.update(pr)
         .set(pr.vehicle_no, pr.lr_no)
-        .where(pr.lr_no.regexp(REGEX_PATTERN))
+        .set(pr.lr_no, "")
+        .where(pr.name.isin(receipts))
         .run()
     )
-
-    (frappe.qb.update(pr).set(pr.lr_no, "").where(pr.lr_no.regexp(REGEX_PATTERN)).run())